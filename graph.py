@@ -1,96 +1,266 @@
+from array import array
+
+
+# máscara de bits com as cores 1..9 (bit v-1 representa a cor v)
+ALL_COLORS = (1 << 9) - 1
+
+
 class Vertex:
-    """Representação de um vértice no grafo do Sudoku"""
+    """
+    Representação de um vértice no grafo do Sudoku
+    O estado do vértice (cor, domínio, saturação, vizinhos) fica nos vetores do
+    grafo, indexados pelo id; o objeto é só uma visão sobre eles e precisa
+    pertencer a um grafo para ser usado
+    """
+    __slots__ = ('id', 'row', 'col', 'value', 'graph')
+    
     def __init__(self, id, value=0, row=0, col=0):
         self.id = id
         self.row = row
         self.col = col
-        self.value = value
-        self.color = None
-        self.neighbors = set()
-        self.is_fixed = False # verdadeiro se é uma célula preenchida previamente
+        self.value = value # valor inicial, aplicado quando o vértice entra no grafo
+        self.graph = None # grafo ao qual o vértice pertence
         
-        # se valor!=0, a célula é fixa, não pode ser alterada e não tem domínio
-        if value != 0:
-            self.domain = set()
-            self.color = value
-            self.is_fixed = True
-        else:
-            self.domain = set(range(1, 10))
+    @property
+    def color(self):
+        return self.graph.colors[self.id] or None
+    
+    @color.setter
+    def color(self, color):
+        self.graph.set_color(self.id, color)
         
-        #saturação inicial é 0
-        self.saturation = 0
+    @property
+    def is_fixed(self):
+        """Verdadeiro se é uma célula preenchida previamente"""
+        return bool(self.graph.fixed[self.id])
+    
+    @property
+    def domain(self):
+        """Domínio como máscara de bits: bit v-1 ligado se a cor v é permitida"""
+        return self.graph.domains[self.id]
+    
+    @property
+    def saturation(self):
+        """Grau de saturação (número de cores distintas usadas pelos vizinhos)"""
+        return self.graph.saturations[self.id]
+    
+    @property
+    def avail_mask(self):
+        """Cópia mantida de get_available_colors()"""
+        return self.graph.avail_masks[self.id]
+    
+    @property
+    def degree(self):
+        return self.graph.degrees[self.id]
+    
+    @property
+    def neighbor_mask(self):
+        """Bit j ligado se o vértice j é vizinho"""
+        return self.graph.neighbor_masks[self.id]
+    
+    @property
+    def neighbors(self):
+        return [self.graph.vertices[neighbor_id] for neighbor_id in self.graph.adjacency[self.id]]
         
     def add_neighbor(self, neighbor):
         """Adiciona um vizinho ao vértice"""
-        self.neighbors.add(neighbor)
-        neighbor.neighbors.add(self)
+        graph = self.graph
+        if (graph.neighbor_masks[self.id] >> neighbor.id) & 1:
+            return
+        graph.adjacency[self.id].append(neighbor.id)
+        graph.neighbor_masks[self.id] |= 1 << neighbor.id
+        graph.degrees[self.id] += 1
+        
+    def get_used_colors_mask(self):
+        """Retorna a máscara de bits das cores usadas pelos vizinhos"""
+        return self.graph.get_used_colors_mask(self.id)
         
     def get_available_colors(self):
-        """Retorna as cores disponíveis para este vértice"""
+        """Retorna a máscara de bits das cores disponíveis para este vértice"""
         
         if self.is_fixed:
-            return set() # não há cores disponíveis se é uma célula fixa
-        
-        used_colors = set()
-        for neighbor in self.neighbors:
-            if neighbor.color is not None:
-                used_colors.add(neighbor.color)
+            return 0 # não há cores disponíveis se é uma célula fixa
         
         # retorna as cores não usadas pelos vizinhos 
-        return self.domain - used_colors
+        return self.domain & ~self.get_used_colors_mask()
     
     def update_saturation(self):
-        """Atualiza o grau de saturação"""
-        
-        used_colors = set()
-        for neighbor in self.neighbors:
-            if neighbor.color is not None:
-                used_colors.add(neighbor.color)
-        
-        # grau de saturação = número de cores únicas usadas pelos vizinhos
-        self.saturation = len(used_colors)   
+        """Atualiza o grau de saturação e a máscara de cores disponíveis"""
+        self.graph.update_saturation(self.id)
     
     def is_colored(self):
         """Verifica se o vértice está colorido"""
-        return self.color is not None
+        return self.graph.colors[self.id] != 0
     
 
     
 class Graph:
     """Representação do grafo para coloração"""
     def __init__(self):
-        self.vertices = {}
+        # vértices indexados diretamente pelo id (os ids devem ser 0..n-1)
+        self.vertices = []
         self.edges = []
         self.size = 0
         
+        # estado dos vértices em vetores paralelos indexados pelo id
+        self.colors = array('b') # 0 = sem cor
+        self.domains = array('H') # cores permitidas (vazio numa célula fixa)
+        self.fixed = array('B') # 1 se é uma célula preenchida previamente
+        self.saturations = array('B')
+        self.avail_masks = array('H') # domains & ~used_mask, mantido a cada mudança de cor
+        self.degrees = array('H')
+        self.adjacency = [] # ids dos vizinhos de cada vértice
+        self.neighbor_masks = [] # bit j ligado se o vértice j é vizinho
+        
+        # máscara das cores usadas pelos vizinhos de cada vértice, mantida
+        # incrementalmente; used_count[id*9 + cor-1] conta quantos vizinhos usam a cor
+        self.used_mask = array('H')
+        self.used_count = array('B')
+        
     def add_vertex(self, vertex):
         """Adiciona um vértice ao grafo"""
+        while len(self.vertices) <= vertex.id:
+            self.vertices.append(None)
+            self.colors.append(0)
+            self.domains.append(0)
+            self.fixed.append(0)
+            self.saturations.append(0)
+            self.avail_masks.append(0)
+            self.degrees.append(0)
+            self.adjacency.append([])
+            self.neighbor_masks.append(0)
+            self.used_mask.append(0)
+            self.used_count.extend([0] * 9)
         self.vertices[vertex.id] = vertex
         self.size += 1
+        vertex.graph = self
+        self.reset_vertex(vertex.id, vertex.value)
+        
+    def clone_structure(self):
+        """Cria um grafo com os mesmos vértices e arestas, mas sem cores"""
+        clone = Graph()
+        for vertex in self.vertices:
+            clone.add_vertex(Vertex(vertex.id, 0, vertex.row, vertex.col))
+            
+        # reaproveita a topologia já calculada em vez de chamar add_edge
+        clone.adjacency = [list(neighbor_ids) for neighbor_ids in self.adjacency]
+        clone.neighbor_masks = list(self.neighbor_masks)
+        clone.degrees = array('H', self.degrees)
+        clone.edges = [(clone.vertices[v1.id], clone.vertices[v2.id]) for v1, v2 in self.edges]
+        return clone
+    
+    def reset_vertex(self, vertex_id, value):
+        """Redefine o estado mutável de um vértice para um novo valor inicial"""
+        self.vertices[vertex_id].value = value
+        
+        # se valor!=0, a célula é fixa, não pode ser alterada e não tem domínio
+        if value != 0:
+            self.set_color(vertex_id, value)
+            self.fixed[vertex_id] = 1
+            self.domains[vertex_id] = 0
+        else:
+            self.set_color(vertex_id, None)
+            self.fixed[vertex_id] = 0
+            self.domains[vertex_id] = ALL_COLORS
+        
+        #saturação e cores disponíveis a partir das cores atuais dos vizinhos
+        self.update_saturation(vertex_id)
+    
+    def reset_values(self, values):
+        """Redefine os valores iniciais dos vértices (values indexado pelo id)"""
+        for vertex in self.vertices:
+            self.reset_vertex(vertex.id, values[vertex.id])
+        
+    def set_color(self, vertex_id, color):
+        """Registra a cor de um vértice e atualiza as cores usadas pelos vizinhos"""
+        old_color = self.colors[vertex_id]
+        if old_color:
+            self._remove_color(vertex_id, old_color)
+            
+        # 0 e None significam "sem cor"
+        if not color:
+            self.colors[vertex_id] = 0
+        else:
+            self.colors[vertex_id] = color
+            self._apply_color(vertex_id, color)
+            
+    def _apply_color(self, vertex_id, color):
+        """Marca a cor como usada em todos os vizinhos do vértice (e atualiza sua saturação)"""
+        for neighbor_id in self.adjacency[vertex_id]:
+            self._count_used_color(neighbor_id, color)
+                
+    def _count_used_color(self, vertex_id, color):
+        """Conta mais um vizinho do vértice com a cor; no primeiro, a cor passa a ser usada"""
+        index = vertex_id * 9 + color - 1
+        self.used_count[index] += 1
+        if self.used_count[index] == 1:
+            bit = 1 << (color - 1)
+            self.used_mask[vertex_id] |= bit
+            self.saturations[vertex_id] += 1
+            self.avail_masks[vertex_id] &= ~bit
+                
+    def _remove_color(self, vertex_id, color):
+        """Desmarca a cor nos vizinhos que não a recebem de mais nenhum vértice"""
+        bit = 1 << (color - 1)
+        used_count = self.used_count
+        for neighbor_id in self.adjacency[vertex_id]:
+            index = neighbor_id * 9 + color - 1
+            used_count[index] -= 1
+            if used_count[index] == 0:
+                self.used_mask[neighbor_id] &= ~bit
+                self.saturations[neighbor_id] -= 1
+                self.avail_masks[neighbor_id] |= self.domains[neighbor_id] & bit
+            
+    def get_used_colors_mask(self, vertex_id):
+        """Retorna a máscara de bits das cores usadas pelos vizinhos de um vértice"""
+        return self.used_mask[vertex_id]
+    
+    def update_saturation(self, vertex_id):
+        """Recalcula a saturação e as cores disponíveis de um vértice"""
+        used_mask = self.used_mask[vertex_id]
+        
+        # grau de saturação = número de cores únicas usadas pelos vizinhos
+        self.saturations[vertex_id] = used_mask.bit_count()
+        self.avail_masks[vertex_id] = self.domains[vertex_id] & ~used_mask
+    
+    def _has_vertex(self, vertex_id):
+        """Verifica se existe um vértice com o id dado"""
+        return 0 <= vertex_id < len(self.vertices) and self.vertices[vertex_id] is not None
     
     def add_edge(self, vertex1_id, vertex2_id):
         """Adiciona uma aresta entre dois vértices"""
-        if vertex1_id in self.vertices and vertex2_id in self.vertices:
+        if self._has_vertex(vertex1_id) and self._has_vertex(vertex2_id):
             vertex1 = self.vertices[vertex1_id]
             vertex2 = self.vertices[vertex2_id]
+            
+            # aresta repetida contaria as cores em dobro
+            if (self.neighbor_masks[vertex1_id] >> vertex2_id) & 1:
+                return
+            
             vertex1.add_neighbor(vertex2)
+            vertex2.add_neighbor(vertex1)
             self.edges.append((vertex1, vertex2))
+            
+            # vértices já coloridos passam a restringir o novo vizinho
+            for vertex_id, neighbor_id in ((vertex1_id, vertex2_id), (vertex2_id, vertex1_id)):
+                color = self.colors[vertex_id]
+                if color:
+                    self._count_used_color(neighbor_id, color)
 
     def get_uncolored_vertices(self):
         """Retorna vértices não coloridos (sem células fixas)"""
-        return [v for v in self.vertices.values() if not v.is_colored() and not v.is_fixed]
+        return [v for v in self.vertices
+                if v is not None and not self.colors[v.id] and not self.fixed[v.id]]
     
     def update_all_saturations(self):
         """Atualiza a saturação de todos os vértices"""
-        for vertex in self.vertices.values():
-            vertex.update_saturation()
+        for vertex_id in range(len(self.vertices)):
+            self.update_saturation(vertex_id)
             
     def is_valid_coloring(self):
         """Verifica se a coloração atual é válida"""
-        for vertex in self.vertices.values():
+        for vertex_id, color in enumerate(self.colors):
             #se o vértice está colorido, verifica se não conflita com vizinhos
-            if vertex.color is not None:
-                for neighbor in vertex.neighbors:
-                    if neighbor.color is not None and vertex.color == neighbor.color:
-                        return False
+            if color and (self.used_mask[vertex_id] >> (color - 1)) & 1:
+                return False
         return True
\ No newline at end of file
@@ -4,11 +4,29 @@ import time
 import json
 import statistics
 import csv
-from typing import Dict, Any
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
 from sudoku_board import SudokuBoard
 from sudoku_solver import SimpleSudokuSolver, DSATURSudokuSolver
 
 
+# solvers disponíveis para os experimentos
+SOLVERS = {
+    'simple': SimpleSudokuSolver,
+    'dsatur': DSATURSudokuSolver,
+}
+
+
+def _solve_one(task):
+    """Resolve um Sudoku em um processo do pool (função de módulo para poder ser serializada)"""
+    solver_type, index, run, board = task
+    solver = SOLVERS[solver_type]()
+    success, solve_time = solver.solve(board)
+    stats = solver.get_stats()
+    return index, run, success, solve_time, stats.nodes_explored, stats.backtrack_count
+
+
 class SudokuExperiment:
     """Classe para gerenciar experimentos do projeto"""
     def __init__(self, input_file: str):
@@ -18,84 +36,112 @@ class SudokuExperiment:
     def load_sudokus(self) -> bool:
         """Carrega os Sudokus do arquivo .txt"""
         
+        # leitura linha a linha: só a grade atual fica em memória
         with open(self.input_file, 'r') as file:
-            content = file.read().strip()
-        grids = content.split('Grid ')
-        for grid_data in grids:
-            if not grid_data.strip():
-                continue
-            lines = grid_data.strip().split('\n')
-            grid_number = lines[0].strip()
-            grid_lines = lines[1:10]
-            if len(grid_lines) != 9:
-                continue
-            board = SudokuBoard()
-            board.load_from_string('\n'.join(grid_lines))
-            if board.is_valid():
-                self.sudoku_boards.append({
-                    'id': len(self.sudoku_boards) + 1,
-                    'original_id': grid_number,
-                    'board': board,
-                })
+            line = file.readline()
+            while line:
+                if not line.startswith('Grid '):
+                    line = file.readline()
+                    continue
+                grid_number = line[len('Grid '):].strip()
+                
+                # linhas da grade até o próximo cabeçalho (ou o fim do arquivo);
+                # linhas em branco só contam se houver uma linha preenchida depois
+                # delas, então as do fim do bloco são ignoradas
+                grid_lines = []
+                blank_lines = 0
+                line = file.readline()
+                while line and not line.startswith('Grid '):
+                    if not line.strip():
+                        blank_lines += 1
+                    else:
+                        while blank_lines and len(grid_lines) < 9:
+                            grid_lines.append('')
+                            blank_lines -= 1
+                        blank_lines = 0
+                        if len(grid_lines) < 9:
+                            grid_lines.append(line.rstrip('\n'))
+                    line = file.readline()
+                    
+                if len(grid_lines) != 9:
+                    continue
+                board = SudokuBoard()
+                board.load_from_string('\n'.join(grid_lines))
+                if board.is_valid():
+                    self.sudoku_boards.append({
+                        'id': len(self.sudoku_boards) + 1,
+                        'original_id': grid_number,
+                        'board': board,
+                    })
         print(f"Carregados {len(self.sudoku_boards)} Sudokus válidos.")
         return len(self.sudoku_boards) > 0
         
 
-    def run_solver(self, solver_type: str, num_runs: int, max_time: float = 300.0) -> Dict[str, Any]:
-        """Executa um solver específico por uma determinada quantidade de vezes"""
+    def run_solver(self, solver_type: str, num_runs: int, max_time: float = 300.0,
+                   workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Executa um solver específico por uma determinada quantidade de vezes
+        As resoluções são independentes e são distribuídas entre `workers` processos
+        (por padrão, um por núcleo de CPU)
+        """
         print(f"\n=== Executando: {solver_type.upper()} ({num_runs} execuções) ===")
         
-        run_data = {
-            sudoku['id']: {'times': [], 'nodes': 0, 'backtracks': 0} 
-            for sudoku in self.sudoku_boards
-        }
+        total_sudokus = len(self.sudoku_boards)
+        
+        # tempos em uma matriz [sudoku][execução] e contadores por sudoku,
+        # indexados pela posição do sudoku na lista
+        times = [array('d', [0.0]) * num_runs for _ in range(total_sudokus)]
+        nodes = array('q', [0]) * total_sudokus
+        backtracks = array('q', [0]) * total_sudokus
 
-        for i in range(num_runs):
-            print(f"\n--- Execução {i+1}/{num_runs} ---")
-            for sudoku_data in self.sudoku_boards:
-                sudoku_id = sudoku_data['id']
-                board = sudoku_data['board'].copy()
-                solver = SimpleSudokuSolver() if solver_type == 'simple' else DSATURSudokuSolver()
+        # cada tarefa recebe sua própria cópia do tabuleiro ao ser enviada ao processo
+        tasks = [
+            (solver_type, index, i, sudoku_data['board'])
+            for i in range(num_runs)
+            for index, sudoku_data in enumerate(self.sudoku_boards)
+        ]
 
-                print(f"Resolvendo Sudoku {sudoku_id:2d}...", end=" ", flush=True)
-                success, solve_time = solver.solve(board)
-                stats = solver.get_stats()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map devolve os resultados na ordem das tarefas
+            for index, i, success, solve_time, solve_nodes, solve_backtracks in executor.map(_solve_one, tasks, chunksize=8):
+                if index == 0:
+                    print(f"\n--- Execução {i+1}/{num_runs} ---")
+                sudoku_id = self.sudoku_boards[index]['id']
                 
                 status = "SOLVED" if success and solve_time <= max_time else ("TIMEOUT" if solve_time > max_time else "FAILED")
-                run_data[sudoku_id]['times'].append(solve_time)
+                times[index][i] = solve_time
                 
                 if i == 0:  # valores determinísticos coletados apenas na primeira execução
-                    run_data[sudoku_id]['nodes'] = stats['nodes_explored']
-                    run_data[sudoku_id]['backtracks'] = stats['backtrack_count']
+                    nodes[index] = solve_nodes
+                    backtracks[index] = solve_backtracks
                 
-                print(f"{status:8s} ({solve_time:6.3f}s)")
+                # uma única escrita (sem flush forçado) por resolução
+                print(f"Resolvendo Sudoku {sudoku_id:2d}... {status:8s} ({solve_time:6.3f}s)")
         
         # estatísticas finais
         results = []
         total_time = total_nodes = total_backtracks = 0
         
-        for sudoku_data in self.sudoku_boards:
-            sudoku_id = sudoku_data['id']
-            times = run_data[sudoku_id]['times']
+        for index, sudoku_data in enumerate(self.sudoku_boards):
+            sudoku_times = times[index]
             
-            time_mean = statistics.mean(times)
-            time_std_dev = statistics.stdev(times) if len(times) > 1 else 0
+            time_mean = statistics.fmean(sudoku_times)
+            time_std_dev = statistics.stdev(sudoku_times) if num_runs > 1 else 0
             
             total_time += time_mean
-            total_nodes += run_data[sudoku_id]['nodes']
-            total_backtracks += run_data[sudoku_id]['backtracks']
+            total_nodes += nodes[index]
+            total_backtracks += backtracks[index]
 
             results.append({
-                'sudoku_id': sudoku_id,
+                'sudoku_id': sudoku_data['id'],
                 'original_id': sudoku_data['original_id'],
-                'nodes_explored': run_data[sudoku_id]['nodes'],
-                'backtrack_count': run_data[sudoku_id]['backtracks'],
+                'nodes_explored': nodes[index],
+                'backtrack_count': backtracks[index],
                 'time_mean': time_mean,
                 'time_std_dev': time_std_dev,
-                'all_times': times
+                'all_times': sudoku_times.tolist()
             })
 
-        total_sudokus = len(self.sudoku_boards)
         return {
             'solver_type': solver_type,
             'num_runs': num_runs,
@@ -106,12 +152,13 @@ class SudokuExperiment:
             'results': results
         }
 
-    def run_comparison(self, num_runs: int, max_time: float = 300.0) -> Dict[str, Any]:
+    def run_comparison(self, num_runs: int, max_time: float = 300.0,
+                       workers: Optional[int] = None) -> Dict[str, Any]:
         """Executa experimento comparativo completo"""
         print(f"\n=== EXPERIMENTO COMPARATIVO ({num_runs} execuções por Sudoku) ===")
         
-        simple_results = self.run_solver('simple', num_runs, max_time)
-        dsatur_results = self.run_solver('dsatur', num_runs, max_time)
+        simple_results = self.run_solver('simple', num_runs, max_time, workers)
+        dsatur_results = self.run_solver('dsatur', num_runs, max_time, workers)
         
         
         return {
@@ -127,14 +174,14 @@ class SudokuExperiment:
             }
         }
 
-    def save_results(self, results: Dict[str, Any]):
-        """Salva resultados em JSON e CSV"""
+    def save_results(self, results: Dict[str, Any], pretty_json: bool = False):
+        """Salva resultados em JSON e CSV (JSON compacto, ou indentado com pretty_json=True)"""
         ts = int(time.time())
         
         # json
         json_filename = f"results_{ts}.json"
         with open(json_filename, 'w') as f:
-            json.dump(results, f, indent=2)
+            json.dump(results, f, indent=2 if pretty_json else None)
         print(f"\nResultados (JSON) salvos em: {json_filename}")
         
         # csv para plotagem
@@ -143,21 +190,23 @@ class SudokuExperiment:
                   'simple_nodes', 'simple_backtracks', 'dsatur_time_mean', 'dsatur_time_std_dev', 
                   'dsatur_nodes', 'dsatur_backtracks']
         
+        # monta todas as linhas antes e grava de uma vez
+        dsatur_res = {r['sudoku_id']: r for r in results['dsatur']['results']}
+        rows = []
+        for simple in results['simple']['results']:
+            dsatur = dsatur_res[simple['sudoku_id']]
+            rows.append((
+                simple['sudoku_id'], simple['original_id'],
+                simple['time_mean'], simple['time_std_dev'],
+                simple['nodes_explored'], simple['backtrack_count'],
+                dsatur['time_mean'], dsatur['time_std_dev'],
+                dsatur['nodes_explored'], dsatur['backtrack_count'],
+            ))
+        
         with open(csv_filename, 'w', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(header)
-            
-            simple_res = {r['sudoku_id']: r for r in results['simple']['results']}
-            dsatur_res = {r['sudoku_id']: r for r in results['dsatur']['results']}
-            
-            for sid in simple_res:
-                writer.writerow([
-                    sid, simple_res[sid]['original_id'],
-                    simple_res[sid]['time_mean'], simple_res[sid]['time_std_dev'],
-                    simple_res[sid]['nodes_explored'], simple_res[sid]['backtrack_count'],
-                    dsatur_res[sid]['time_mean'], dsatur_res[sid]['time_std_dev'],
-                    dsatur_res[sid]['nodes_explored'], dsatur_res[sid]['backtrack_count'],
-                ])
+            writer.writerows(rows)
         print(f"Dados (CSV) salvos em: {csv_filename}")
 
     def print_summary(self, results: Dict[str, Any]):
@@ -1,84 +1,167 @@
+from array import array
 from graph import Graph, Vertex
 
+
+# índices das células de cada linha, coluna e bloco 3x3 (blocos numerados por linha)
+ROW_PEERS = [tuple(row * 9 + col for col in range(9)) for row in range(9)]
+COL_PEERS = [tuple(row * 9 + col for row in range(9)) for col in range(9)]
+BOX_PEERS = [tuple((box // 3 * 3 + i // 3) * 9 + box % 3 * 3 + i % 3 for i in range(9))
+             for box in range(9)]
+
+# bloco 3x3 de cada célula, indexado por row*9 + col
+BOX_OF = tuple((cell // 27) * 3 + (cell % 9) // 3 for cell in range(81))
+
+# vizinhos de cada célula no grafo do Sudoku (as 20 células que compartilham
+# linha, coluna ou bloco com ela), calculados uma única vez
+NEIGHBOR_INDEX = [
+    tuple(sorted(set(ROW_PEERS[cell // 9] + COL_PEERS[cell % 9]
+                     + BOX_PEERS[BOX_OF[cell]]) - {cell}))
+    for cell in range(81)
+]
+
+
+# tabela de tradução de bytes: '0'..'9' -> 0..9, qualquer outro byte -> 0
+_DIGIT_TABLE = bytes(i - ord('0') if ord('0') <= i <= ord('9') else 0 for i in range(256))
+
+
+def _build_template_graph():
+    """Constrói o grafo de um Sudoku vazio (81 vértices e suas arestas)"""
+    graph = Graph()
+    for vertex_id in range(81):
+        graph.add_vertex(Vertex(vertex_id, 0, vertex_id // 9, vertex_id % 9))
+        
+    #cada aresta é adicionada uma única vez, a partir do menor índice
+    for vertex_id in range(81):
+        for neighbor_id in NEIGHBOR_INDEX[vertex_id]:
+            if neighbor_id > vertex_id:
+                graph.add_edge(vertex_id, neighbor_id)
+    return graph
+
+
+class _GraphPool:
+    """Reaproveita grafos já clonados do molde entre uma resolução e outra"""
+    def __init__(self, template):
+        self.template = template
+        self._free = []
+        
+    def acquire(self):
+        """Retorna um grafo livre do pool ou clona um novo a partir do molde"""
+        if self._free:
+            return self._free.pop()
+        return self.template.clone_structure()
+    
+    def release(self, graph):
+        """Devolve um grafo ao pool"""
+        self._free.append(graph)
+
+
+# a topologia é a mesma para todo Sudoku 9x9; só os valores iniciais mudam
+_TEMPLATE_GRAPH = _build_template_graph()
+_GRAPH_POOL = _GraphPool(_TEMPLATE_GRAPH)
+
+
 class SudokuBoard:
     """Classe para representar um tabuleiro de Sudoku"""
     
     def __init__(self, grid=None):
-        self.grid = grid if grid else [[0 for _ in range(9)] for _ in range(9)]
+        # grade armazenada de forma linear: a célula (row, col) fica em grid[row * 9 + col]
+        if grid:
+            self.grid = bytearray(value for row in grid for value in row)
+        else:
+            self.grid = bytearray(81)
         self.graph = None
         self.original_grid = None  #estado original da grade
         
+        # máscaras de bits dos valores presentes em cada linha, coluna e bloco
+        # (bit v-1 ligado se o valor v já está presente)
+        self.row_mask = array('H', [0] * 9)
+        self.col_mask = array('H', [0] * 9)
+        self.box_mask = array('H', [0] * 9)
+        self.rebuild_masks()
+        
+    
+    def rebuild_masks(self):
+        """Recalcula as máscaras de linha, coluna e bloco a partir da grade"""
+        for i in range(9):
+            self.row_mask[i] = self.col_mask[i] = self.box_mask[i] = 0
+            
+        for row in range(9):
+            for col in range(9):
+                value = self.grid[row * 9 + col]
+                if value != 0:
+                    bit = 1 << (value - 1)
+                    self.row_mask[row] |= bit
+                    self.col_mask[col] |= bit
+                    self.box_mask[BOX_OF[row * 9 + col]] |= bit
     
     def load_from_string(self, sudoku_string):
         """Carrega o tabuleiro a partir de uma string"""
         lines = sudoku_string.strip().split('\n')
-        self.grid = []
+        self.grid = bytearray()
         
-        for line in lines:
-            row = []
-            
-            for char in line:
-                if char.isdigit():
-                    row.append(int(char))
-                else:
-                    row.append(0)  #troca caracteres não numéricos por 0
+        for line in lines[:9]:
+            #troca '0'..'9' pelo valor numérico e os demais caracteres por 0
+            #(caracteres não ASCII viram '?' para manter uma posição por caractere)
+            row = line.encode('ascii', 'replace').translate(_DIGIT_TABLE)
                     
             #garante que a linha tenha exatamente 9 elementos
-            while len(row) < 9:
-                row.append(0)
-            if len(row) > 9:
-                row = row[:9]
-                
-            self.grid.append(row)
+            self.grid += row[:9].ljust(9, b'\0')
         
         #garante que a grade tenha exatamente 9 linhas
-        while len(self.grid) < 9:
-            self.grid.append([0] * 9)
-        if len(self.grid) > 9:
-            self.grid = self.grid[:9]
+        self.grid.extend(bytes(81 - len(self.grid)))
             
         #estado original da grade
-        self.original_grid = [row[:] for row in self.grid]
+        self.original_grid = bytes(self.grid)
+        self.rebuild_masks()
         
         
     def set_cell(self, row, col, value):
-        self.grid[row][col] = value
+        """Define o valor de uma célula, mantendo as máscaras atualizadas"""
+        box = BOX_OF[row * 9 + col]
+        
+        # remove o valor antigo das máscaras
+        old_value = self.grid[row * 9 + col]
+        if old_value != 0:
+            bit = 1 << (old_value - 1)
+            self.row_mask[row] &= ~bit
+            self.col_mask[col] &= ~bit
+            self.box_mask[box] &= ~bit
+            
+        self.grid[row * 9 + col] = value
+        
+        if value != 0:
+            bit = 1 << (value - 1)
+            self.row_mask[row] |= bit
+            self.col_mask[col] |= bit
+            self.box_mask[box] |= bit
         
     
     def is_empty(self, row, col):
         """Verifica se uma célula está vazia"""
-        return self.grid[row][col] == 0
+        return self.grid[row * 9 + col] == 0
     
     
     def get_row_values(self, row):
         """Retorna os valores de uma linha"""
         if not (0 <= row < 9):
             return []
-        return [val for val in self.grid[row] if val != 0]
+        return [self.grid[i] for i in ROW_PEERS[row] if self.grid[i] != 0]
     
     
     def get_col_values(self, col):
         """Retorna os valores de uma coluna"""
         if not (0 <= col < 9):
             return []
-        return [self.grid[row][col] for row in range(9) if self.grid[row][col] != 0]
+        return [self.grid[i] for i in COL_PEERS[col] if self.grid[i] != 0]
     
     
     def get_box_values(self, row, col):
         """Retorna os valores de um bloco 3x3"""
         if not (0 <= row < 9 and 0 <= col < 9):
             return []
-            
-        box_row = (row // 3) * 3
-        box_col = (col // 3) * 3
-        values = []
         
-        for r in range(box_row, box_row + 3):
-            for c in range(box_col, box_col + 3):
-                if self.grid[r][c] != 0:
-                    values.append(self.grid[r][c])
-                    
-        return values
+        box = BOX_OF[row * 9 + col]
+        return [self.grid[i] for i in BOX_PEERS[box] if self.grid[i] != 0]
     
     
     def is_valid_placement(self, row, col, value):
@@ -88,41 +171,38 @@ class SudokuBoard:
         if not (1 <= value <= 9):
             return False
             
-        # verifica se o valor já está presente na linha
-        if value in self.get_row_values(row):
-            return False
-        
-        # verifica se o valor já está presente na coluna
-        if value in self.get_col_values(col):
-            return False
-        
-        # verifica se o valor já está presente no bloco 3x3
-        if value in self.get_box_values(row, col):
-            return False
-        
-        return True
+        # verifica se o valor já está presente na linha, na coluna ou no bloco 3x3
+        used = self.row_mask[row] | self.col_mask[col] | self.box_mask[BOX_OF[row * 9 + col]]
+        return not (used >> (value - 1)) & 1
     
     
     def is_valid(self):
         """Verifica se o estado atual do tabuleiro é válido"""
-        for row in range(9):
-            for col in range(9):
-                if not self.is_empty(row, col):
-                    value = self.grid[row][col]
-                    # temporariamente remove o valor para verificar a validade
-                    self.grid[row][col] = 0
-                    if not self.is_valid_placement(row, col, value):
-                        self.grid[row][col] = value
-                        return False
-                    
-                    self.grid[row][col] = value
+        # uma única passada pela grade: um valor repetido numa linha, coluna
+        # ou bloco aparece como um bit já ligado na máscara correspondente
+        row_seen = [0] * 9
+        col_seen = [0] * 9
+        box_seen = [0] * 9
+        
+        for index, value in enumerate(self.grid):
+            if value != 0:
+                row, col = divmod(index, 9)
+                box = BOX_OF[index]
+                bit = 1 << (value - 1)
+                
+                if (row_seen[row] | col_seen[col] | box_seen[box]) & bit:
+                    return False
+                
+                row_seen[row] |= bit
+                col_seen[col] |= bit
+                box_seen[box] |= bit
         
         return True
     
     
     def is_complete(self):
         """Verifica se o tabuleiro está completamente preenchido"""
-        return all(self.grid[row][col] != 0 for row in range(9) for col in range(9))
+        return 0 not in self.grid
     
     
     def is_solved(self):
@@ -132,64 +212,36 @@ class SudokuBoard:
         
     def copy(self):
         """Cria uma cópia do tabuleiro"""
-        new_board = SudokuBoard()
-        new_board.grid = [row[:] for row in self.grid]
-        if self.original_grid is not None:
-            new_board.original_grid = [row[:] for row in self.original_grid]
+        new_board = SudokuBoard.__new__(SudokuBoard)
+        new_board.grid = bytearray(self.grid)
+        new_board.graph = None
+        new_board.original_grid = self.original_grid  # bytes imutáveis podem ser compartilhados
+        new_board.row_mask = array('H', self.row_mask)
+        new_board.col_mask = array('H', self.col_mask)
+        new_board.box_mask = array('H', self.box_mask)
         return new_board
     
     
     def to_graph(self):
         """Converte o tabuleiro para um grafo"""
-        self.graph = Graph()
-        
-        # add todos os vértices
-        for row in range(9):
-            for col in range(9):
-                vertex_id = row * 9 + col
-                value = self.grid[row][col]
-                vertex = Vertex(vertex_id, value, row, col)
-                
-                #se a célula já tem valor, define como cor
-                if value != 0:
-                    vertex.color = value
-                
-                self.graph.add_vertex(vertex)
-                
-        
-        #add arestas (entre células que não podem ter o mesmo valor)
-        for row in range(9):
-            for col in range(9):
-                vertex_id = row * 9 + col
-                
-                # conecta com outras células na mesma linha
-                for c in range(9):
-                    if c != col:
-                        neighbor_id = row * 9 + c
-                        self.graph.add_edge(vertex_id, neighbor_id)
-                        
-                # conecta com outras células na mesma coluna
-                for r in range(9):
-                    if r != row:
-                        neighbor_id = r * 9 + col
-                        self.graph.add_edge(vertex_id, neighbor_id)
-                        
-                # conecta com outras células no mesmo bloco
-                box_row = (row // 3) * 3
-                box_col = (col // 3) * 3
-                for r in range(box_row, box_row + 3):
-                    for c in range(box_col, box_col + 3):
-                        if r != row or c != col:
-                            neighbor_id = r * 9 + c
-                            self.graph.add_edge(vertex_id, neighbor_id)
-                            
-                            
+        self.graph = _GRAPH_POOL.acquire()
+        self.graph.reset_values(self.grid)
         return self.graph 
     
+    
+    def release_graph(self):
+        """Devolve o grafo criado por to_graph ao pool para ser reaproveitado"""
+        if self.graph is not None:
+            _GRAPH_POOL.release(self.graph)
+            self.graph = None
+    
 
     def update_from_graph(self, graph):
         """Atualiza o tabuleiro a partir de um grafo colorido"""
-        for vertex in graph.vertices.values():
-            if vertex.color is not None and hasattr(vertex, 'row') and hasattr(vertex, 'col'):
-                if 0 <= vertex.row < 9 and 0 <= vertex.col < 9:
-                    self.grid[vertex.row][vertex.col] = vertex.color
+        # todo vértice criado por to_graph tem row/col dentro do tabuleiro
+        colors = graph.colors
+        for vertex in graph.vertices:
+            color = colors[vertex.id]
+            if color:
+                self.grid[vertex.row * 9 + vertex.col] = color
+        self.rebuild_masks()
@@ -1,7 +1,15 @@
+import heapq
 import time
-from typing import List, Optional, Tuple
-from graph import Graph, Vertex
-from sudoku_board import SudokuBoard
+from typing import List, NamedTuple, Optional, Tuple
+from graph import Graph, ALL_COLORS
+from sudoku_board import SudokuBoard, BOX_OF, NEIGHBOR_INDEX
+
+
+class SolverStats(NamedTuple):
+    """Estatísticas de uma resolução"""
+    nodes_explored: int
+    backtrack_count: int
+    solution_time: float
 
 
 class SimpleSudokuSolver:
@@ -13,6 +21,13 @@ class SimpleSudokuSolver:
         self.start_time = 0
         self.solution_time = 0
         
+        # estado da busca: cópia da grade e máscaras dos valores usados
+        # em cada linha, coluna e bloco
+        self.grid = bytearray(81)
+        self.row_mask = [0] * 9
+        self.col_mask = [0] * 9
+        self.box_mask = [0] * 9
+        
     def reset_counters(self):
         """Reseta os contadores de performance"""
         self.nodes_explored = 0
@@ -23,70 +38,226 @@ class SimpleSudokuSolver:
     def solve(self, board: SudokuBoard) -> Tuple[bool, float]:
         """Resolve o Sudoku usando backtracking simples"""
         self.reset_counters()
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         
-        # verifica se o estado inicial é válido
-        if not board.is_valid():
-            self.solution_time = time.time() - self.start_time
-            return False, self.solution_time
+        # aplica as células fixas de uma vez; um estado inicial inválido ou
+        # contraditório nem chega à busca
+        success = self._install_givens(board)
         
         # backtracking simples
-        success = self.backtrack_solve(board)
+        if success:
+            success = self.backtrack_solve()
         
-        self.solution_time = time.time() - self.start_time
+        if success:
+            board.grid[:] = self.grid
+            board.rebuild_masks()
+        
+        self.solution_time = time.perf_counter() - self.start_time
         return success, self.solution_time
     
-    def backtrack_solve(self, board: SudokuBoard) -> bool:
-        """Algoritmo de backtracking simples para resolver o Sudoku"""
-        # encontra a próxima célula vazia
-        empty_cell = self.find_next_empty_cell(board)
-        if empty_cell is None:
-            return True  #caso todas as células estejam preenchidas
+    def _install_givens(self, board: SudokuBoard) -> bool:
+        """
+        Prepara o estado da busca a partir das células fixas do tabuleiro
+        A busca trabalha sobre cópias; o tabuleiro só é alterado no sucesso. As
+        máscaras são montadas numa única passada que também valida o estado
+        inicial (um valor repetido aparece como bit já ligado), e a propagação de
+        candidatos únicos roda uma vez sobre todas as células vazias. As células
+        forçadas aqui passam a valer como fixas. Retorna False se o estado
+        inicial for inválido ou contraditório.
+        """
+        self.grid = bytearray(board.grid)
+        row_mask = self.row_mask = [0] * 9
+        col_mask = self.col_mask = [0] * 9
+        box_mask = self.box_mask = [0] * 9
+        for cell, value in enumerate(self.grid):
+            if value:
+                row, col = divmod(cell, 9)
+                box = BOX_OF[cell]
+                bit = 1 << (value - 1)
+                if (row_mask[row] | col_mask[col] | box_mask[box]) & bit:
+                    return False
+                row_mask[row] |= bit
+                col_mask[col] |= bit
+                box_mask[box] |= bit
         
-        row, col = empty_cell
-        self.nodes_explored += 1
+        empty_cells = [cell for cell, value in enumerate(self.grid) if not value]
+        return self.propagate_singles(empty_cells, [])
+    
+    def backtrack_solve(self) -> bool:
+        """
+        Algoritmo de backtracking simples para resolver o Sudoku
+        Iterativo: cada nível da busca é um quadro [linha, coluna, bloco, candidatos
+        restantes (em ordem inversa de tentativa), bit do valor colocado, células
+        forçadas pela propagação] numa pilha explícita
+        """
+        stack = []
         
-        #tentativa de colocar valores de 1 a 9
-        for value in range(1, 10):
-            if board.is_valid_placement(row, col, value):
-                #coloca o valor
-                board.set_cell(row, col, value)
+        while True:
+            # desce um nível: escolhe a célula vazia mais restrita (MRV)
+            empty_cell = self.find_most_constrained_cell()
+            if empty_cell is None:
+                return True  #caso todas as células estejam preenchidas
+            
+            row, col, candidates = empty_cell
+            self.nodes_explored += 1
+            stack.append([row, col, BOX_OF[row * 9 + col],
+                          self.order_candidates(row * 9 + col, candidates), 0, []])
+            
+            # tenta o próximo candidato do topo da pilha, desempilhando os níveis esgotados
+            while stack:
+                frame = stack[-1]
+                row, col, box, candidates, bit, forced = frame
                 
-                #recursão
-                if self.backtrack_solve(board):
-                    return True
+                # backtrack do valor tentado anteriormente neste nível
+                # (e das células que ele forçou)
+                if bit:
+                    self.undo_assignments(forced)
+                    self.row_mask[row] ^= bit
+                    self.col_mask[col] ^= bit
+                    self.box_mask[box] ^= bit
+                    self.backtrack_count += 1
+                
+                if candidates:
+                    #coloca o próximo valor candidato (o menos restritivo restante)
+                    bit = candidates.pop()
+                    frame[4] = bit
+                    self.grid[row * 9 + col] = bit.bit_length()
+                    self.row_mask[row] ^= bit
+                    self.col_mask[col] ^= bit
+                    self.box_mask[box] ^= bit
+                    
+                    # propaga as células forçadas; numa contradição, o próximo
+                    # passo do laço desfaz este valor e tenta o seguinte
+                    forced = frame[5] = []
+                    if self.propagate_singles(list(NEIGHBOR_INDEX[row * 9 + col]), forced):
+                        break
+                    continue
                 
-                # backtrack
-                board.set_cell(row, col, 0)
-                self.backtrack_count += 1
+                # nenhum valor serviu: volta ao nível anterior
+                self.grid[row * 9 + col] = 0
+                stack.pop()
+            else:
+                return False
+    
+    def order_candidates(self, index: int, candidates: int) -> List[int]:
+        """
+        Ordena os candidatos de uma célula pelo valor menos restritivo (LCV)
+        Cada bit é pontuado pela soma dos candidatos que sobram nos vizinhos vazios
+        depois de removê-lo; o de maior pontuação é tentado primeiro. Retorna os bits
+        em ordem inversa de tentativa, para serem consumidos com pop()
+        """
+        # bits do maior para o menor: nos empates, o menor valor sai primeiro no pop()
+        bits = []
+        while candidates:
+            bit = 1 << (candidates.bit_length() - 1)
+            candidates ^= bit
+            bits.append(bit)
+        if len(bits) <= 1:
+            return bits
         
-        return False
+        peer_candidates = []
+        for peer in NEIGHBOR_INDEX[index]:
+            if not self.grid[peer]:
+                row, col = divmod(peer, 9)
+                peer_candidates.append(
+                    ~(self.row_mask[row] | self.col_mask[col] | self.box_mask[BOX_OF[peer]]) & ALL_COLORS)
+        
+        bits.sort(key=lambda bit: sum((mask & ~bit).bit_count() for mask in peer_candidates))
+        return bits
     
-    def find_next_empty_cell(self, board: SudokuBoard) -> Optional[Tuple[int, int]]:
-        """Encontra a próxima célula vazia em sequência"""
-        for row in range(9):
-            for col in range(9):
-                if board.is_empty(row, col):
-                    return (row, col)
-        return None
+    def propagate_singles(self, pending: List[int], forced: List[Tuple[int, int]]) -> bool:
+        """
+        Preenche as células vazias com um único candidato até o ponto fixo
+        Só os vizinhos de células recém-preenchidas podem mudar, então eles formam
+        a lista de trabalho pending (consumida no lugar). As atribuições são
+        registradas em forced como (índice, bit) para serem desfeitas. Retorna
+        False se alguma célula ficar sem candidatos.
+        """
+        while pending:
+            index = pending.pop()
+            if self.grid[index]:
+                continue
+            
+            row, col = divmod(index, 9)
+            box = BOX_OF[index]
+            candidates = ~(self.row_mask[row] | self.col_mask[col] | self.box_mask[box]) & ALL_COLORS
+            if candidates == 0:
+                return False
+            
+            # único candidato: a célula é forçada
+            if candidates & (candidates - 1) == 0:
+                self.grid[index] = candidates.bit_length()
+                self.row_mask[row] ^= candidates
+                self.col_mask[col] ^= candidates
+                self.box_mask[box] ^= candidates
+                forced.append((index, candidates))
+                pending.extend(NEIGHBOR_INDEX[index])
+                
+        return True
     
-    def get_stats(self):
+    def undo_assignments(self, forced: List[Tuple[int, int]]):
+        """Desfaz as atribuições feitas pela propagação, da mais recente para a mais antiga"""
+        for index, bit in reversed(forced):
+            row, col = divmod(index, 9)
+            self.grid[index] = 0
+            self.row_mask[row] ^= bit
+            self.col_mask[col] ^= bit
+            self.box_mask[BOX_OF[index]] ^= bit
+        forced.clear()
+    
+    def find_most_constrained_cell(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Encontra a célula vazia com menos valores candidatos (MRV)
+        Retorna (linha, coluna, máscara de candidatos), ou None se não há células vazias
+        """
+        best = None
+        best_count = 10
+        
+        index = self.grid.find(0)
+        while index >= 0:
+            row, col = divmod(index, 9)
+            candidates = ~(self.row_mask[row] | self.col_mask[col] | self.box_mask[BOX_OF[index]]) & ALL_COLORS
+            count = candidates.bit_count()
+            if count < best_count:
+                best = (row, col, candidates)
+                best_count = count
+                # não há como ficar mais restrito (0 = beco sem saída)
+                if count <= 1:
+                    break
+            index = self.grid.find(0, index + 1)
+            
+        return best
+    
+    def get_stats(self) -> SolverStats:
         """Estatísticas da resolução"""
-        return {
-            'nodes_explored': self.nodes_explored,
-            'backtrack_count': self.backtrack_count,
-            'solution_time': self.solution_time
-        }
+        return SolverStats(self.nodes_explored, self.backtrack_count, self.solution_time)
+
+
+def _dsatur_key(graph: Graph, vertex_id: int):
+    """Chave de ordenação do DSATUR (o menor valor é o próximo vértice a colorir)"""
+    return (
+        -graph.saturations[vertex_id],                  # maior saturação
+        -graph.degrees[vertex_id],                      # maior grau
+        graph.avail_masks[vertex_id].bit_count()        # menor domínio
+    )
 
 
 class DSATURSudokuSolver:
     """Classe para resolver Sudoku usando backtracking orientado pelo algoritmo DSATUR"""
+    
+    # a fila é reconstruída quando passa deste múltiplo do número de vértices
+    PQ_COMPACT_FACTOR = 4
+    
     def __init__(self):
         self.nodes_explored = 0
         self.backtrack_count = 0
         self.start_time = 0
         self.solution_time = 0
         
+        # fila de prioridade dos vértices sem cor: entradas (chave DSATUR, id);
+        # entradas desatualizadas são descartadas ao sair da fila
+        self._pq = []
+        
     def reset_counters(self):
         """Reseta os contadores de performance"""
         self.nodes_explored = 0
@@ -97,101 +268,162 @@ class DSATURSudokuSolver:
     def solve(self, board: SudokuBoard) -> Tuple[bool, float]:
         """Resolve o Sudoku usando backtracking com DSATUR"""
         self.reset_counters()
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         
         # transforma o tabuleiro em grafo
         graph = board.to_graph()
         
-        # verifica se o estado inicial é válido
-        if not graph.is_valid_coloring():
-            self.solution_time = time.time() - self.start_time
-            return False, self.solution_time
+        # verifica se o estado inicial é válido e propaga as células fixas uma
+        # vez antes da busca; os vértices forçados aqui passam a valer como fixos
+        self._pq = []
+        success = graph.is_valid_coloring() and self.propagate_singles(
+            graph, [v.id for v in graph.get_uncolored_vertices()], [])
         
         # DSATUR com backtracking
-        success = self.dsatur_backtrack(graph)
+        if success:
+            self._rebuild_queue(graph)
+            success = self.dsatur_backtrack(graph)
+        self._pq = []
         
         # att o tabuleiro
         if success:
             board.update_from_graph(graph)
+        board.release_graph()
         
-        self.solution_time = time.time() - self.start_time
+        self.solution_time = time.perf_counter() - self.start_time
         return success, self.solution_time
     
     def dsatur_backtrack(self, graph: Graph) -> bool:
         """Algoritmo DSATUR com backtracking"""
-        #verifica se todos os vértices estão coloridos
-        uncolored = graph.get_uncolored_vertices()
-        if not uncolored:
-            return graph.is_valid_coloring()
-        
-        #escolha do próx vértice usando DSATUR
-        vertex = self.select_vertex_dsatur(graph, uncolored)
+        #escolha do próx vértice usando DSATUR; sem vértices na fila, todos
+        #estão coloridos, e como toda cor atribuída respeita os vizinhos,
+        #a coloração completa já é válida
+        vertex_id = self.select_vertex_dsatur(graph)
+        if vertex_id is None:
+            return True
         self.nodes_explored += 1
         
         #tenta cada cor possível
-        available_colors = vertex.get_available_colors()
+        available_colors = graph.avail_masks[vertex_id]
         
-        #se não há cores disponíveis, falha
+        #se não há cores disponíveis, falha (o vértice volta para a fila)
         if not available_colors:
+            self._push(graph, vertex_id)
             return False
             
-        for color in sorted(available_colors):
+        #percorre os bits da máscara em ordem crescente de cor
+        while available_colors:
+            bit = available_colors & -available_colors
+            available_colors ^= bit
+            
             #atribui a cor
-            vertex.color = color
+            #as saturações dos vizinhos são atualizadas pelo grafo ao colorir
+            graph.set_color(vertex_id, bit.bit_length())
+            self._push_neighbors(graph, vertex_id)
             
             #verifica se a coloração é válida
-            if self.is_valid_coloring_local(vertex):
-                #att saturações
-                graph.update_all_saturations()
-                
-                #recursão
-                if self.dsatur_backtrack(graph):
+            if self.is_valid_coloring_local(graph, vertex_id):
+                #propaga os vértices forçados e segue a recursão
+                forced = []
+                if (self.propagate_singles(graph, list(graph.adjacency[vertex_id]), forced)
+                        and self.dsatur_backtrack(graph)):
                     return True
+                self.undo_assignments(graph, forced)
             
             #backtrack
-            vertex.color = None
+            graph.set_color(vertex_id, None)
+            self._push_neighbors(graph, vertex_id)
             self.backtrack_count += 1
         
+        #o vértice continua sem cor e volta para a fila
+        self._push(graph, vertex_id)
         return False
     
-    def select_vertex_dsatur(self, graph: Graph, uncolored: List[Vertex]) -> Vertex:
+    def propagate_singles(self, graph: Graph, pending: List[int], forced: List[int]) -> bool:
+        """
+        Colore os vértices sem cor que têm uma única cor disponível até o ponto fixo
+        Só os vizinhos de vértices recém-coloridos podem mudar, então eles formam
+        a lista de trabalho pending (consumida no lugar). Os vértices coloridos são
+        registrados em forced para serem desfeitos. Retorna False se algum vértice
+        ficar sem cores disponíveis.
+        """
+        colors = graph.colors
+        avail_masks = graph.avail_masks
+        while pending:
+            vertex_id = pending.pop()
+            if colors[vertex_id]:
+                continue
+            
+            available_colors = avail_masks[vertex_id]
+            if available_colors == 0:
+                return False
+            
+            # única cor disponível: o vértice é forçado
+            if available_colors & (available_colors - 1) == 0:
+                graph.set_color(vertex_id, available_colors.bit_length())
+                self._push_neighbors(graph, vertex_id)
+                forced.append(vertex_id)
+                pending.extend(graph.adjacency[vertex_id])
+                
+        return True
+    
+    def undo_assignments(self, graph: Graph, forced: List[int]):
+        """Desfaz as cores atribuídas pela propagação, da mais recente para a mais antiga"""
+        for vertex_id in reversed(forced):
+            graph.set_color(vertex_id, None)
+            self._push(graph, vertex_id)
+            self._push_neighbors(graph, vertex_id)
+        forced.clear()
+    
+    def select_vertex_dsatur(self, graph: Graph) -> Optional[int]:
         """
         Seleciona o próximo vértice usando a heurística DSATUR
         1. Maior grau de saturação
         2. Em caso de empate, maior grau
         3. Em caso de empate, menor domínio
+        4. Em caso de empate, menor id
+        Retorna o id do vértice, ou None se não há vértices sem cor
         """
-        # att saturações
-        graph.update_all_saturations()
-        
-        def dsatur_key(vertex):
-            available_colors = len(vertex.get_available_colors())
-            return (
-                -vertex.saturation,        # maior saturação
-                -len(vertex.neighbors),    # maior grau
-                available_colors           # menor domínio
-            )
+        # entradas desatualizadas com chave pior que a atual nunca chegam ao
+        # topo; sem a reconstrução, a fila cresceria durante toda a busca
+        if len(self._pq) > self.PQ_COMPACT_FACTOR * graph.size:
+            self._rebuild_queue(graph)
         
-        return min(uncolored, key=dsatur_key)
+        while self._pq:
+            key, vertex_id = heapq.heappop(self._pq)
+            # descarta entradas de vértices já coloridos ou com chave desatualizada
+            if not graph.colors[vertex_id] and key == _dsatur_key(graph, vertex_id):
+                return vertex_id
+        return None
+    
+    def _rebuild_queue(self, graph: Graph):
+        """Recria a fila com uma entrada, de chave atual, por vértice sem cor"""
+        self._pq = [(_dsatur_key(graph, v.id), v.id) for v in graph.get_uncolored_vertices()]
+        heapq.heapify(self._pq)
+    
+    def _push(self, graph: Graph, vertex_id: int):
+        """Insere o vértice na fila com sua chave DSATUR atual"""
+        heapq.heappush(self._pq, (_dsatur_key(graph, vertex_id), vertex_id))
+    
+    def _push_neighbors(self, graph: Graph, vertex_id: int):
+        """Reinsere na fila os vizinhos sem cor, cuja chave pode ter mudado"""
+        colors = graph.colors
+        for neighbor_id in graph.adjacency[vertex_id]:
+            if not colors[neighbor_id]:
+                self._push(graph, neighbor_id)
     
-    def is_valid_coloring_local(self, vertex: Vertex) -> bool:
+    def is_valid_coloring_local(self, graph: Graph, vertex_id: int) -> bool:
         """Verifica se a coloração de um vértice é válida"""
-        if vertex.color is None:
+        color = graph.colors[vertex_id]
+        if not color:
             return True
         
-        for neighbor in vertex.neighbors:
-            if neighbor.color == vertex.color:
-                return False
-        
-        return True
+        # a cor é inválida se algum vizinho já a usa (bit ligado na máscara do grafo)
+        return not (graph.get_used_colors_mask(vertex_id) >> (color - 1)) & 1
     
-    def get_stats(self):
+    def get_stats(self) -> SolverStats:
         """Estatísticas da resolução"""
-        return {
-            'nodes_explored': self.nodes_explored,
-            'backtrack_count': self.backtrack_count,
-            'solution_time': self.solution_time
-        }
+        return SolverStats(self.nodes_explored, self.backtrack_count, self.solution_time)
 
 
 def solve_sudoku_simple(board: SudokuBoard) -> Tuple[bool, float]: